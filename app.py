@@ -1,14 +1,22 @@
 """Main Flask application for the Live API video-aware call app."""
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
+from turbojpeg import TJPF_BGR
+import cv2
+import numpy as np
 import os
 import asyncio
-import base64
+import functools
+import threading
+import pybase64
 from datetime import datetime
 
-from config import FLASK_HOST, FLASK_PORT, FLASK_DEBUG, IMAGE_STORAGE_DIR
+from config import (
+    FLASK_HOST, FLASK_PORT, FLASK_DEBUG, IMAGE_STORAGE_DIR,
+    AUDIO_INPUT_RATE, AUDIO_CHUNK_SIZE
+)
 from live_api_client import LiveAPIClient
-from video_capture import VideoCapture
+from video_capture import VideoCapture, turbo_jpeg
 from audio_handler import AudioHandler
 from snapshot_tool import create_snapshot_tool, handle_snapshot_tool_call
 from image_manager import ImageManager
@@ -26,6 +34,44 @@ video_capture: VideoCapture = None
 audio_handler: AudioHandler = None
 image_manager: ImageManager = None
 
+# Single event loop that runs all Live API, audio and video coroutines
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, daemon=True).start()
+
+def create_on_loop(factory):
+    """Construct an asyncio object on the background loop's thread.
+    
+    Before Python 3.10, queues, events and locks bind to the current thread's
+    loop when constructed, so they must not be created in request threads.
+    """
+    async def create():
+        return factory()
+    return asyncio.run_coroutine_threadsafe(create(), _loop).result()
+
+# Futures for the current session's long-running coroutines
+_session_futures = set()
+
+# Bounds how many tool-call snapshots may be stored in the background at once
+_store_semaphore = create_on_loop(lambda: asyncio.Semaphore(8))
+_store_tasks = set()
+
+# Outgoing media backlog limits; the oldest item is dropped when full
+FRAME_QUEUE_SIZE = 2
+AUDIO_QUEUE_SIZE = max(1, round(0.2 * AUDIO_INPUT_RATE / AUDIO_CHUNK_SIZE))  # ~200 ms
+
+# Fixed-shape pipeline for outgoing video frames: the Live API takes 768x768
+# JPEG, so the resize target, destination buffer and encoder are bound once
+_resize_buf = np.empty((768, 768, 3), dtype=np.uint8)
+_resize_frame = functools.partial(cv2.resize, dsize=(768, 768), dst=_resize_buf,
+                                  interpolation=cv2.INTER_AREA)
+_encode_frame = functools.partial(turbo_jpeg.encode, quality=85, pixel_format=TJPF_BGR)
+
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """Release the image manager's session at the end of each request."""
+    if image_manager:
+        image_manager.remove_session()
+
 @app.route('/')
 def index():
     """Main application page."""
@@ -40,9 +86,26 @@ def health():
 def snapshot():
     """Capture a snapshot from the video stream."""
     try:
-        data = request.json
-        image_data_b64 = data.get('image', '').split(',')[1]  # Remove data:image/jpeg;base64, prefix
-        image_data = base64.b64decode(image_data_b64)
+        content_type = request.content_type or ''
+        if content_type.startswith('multipart/'):
+            upload = request.files.get('image')
+            # Peek one byte to reject missing or empty uploads
+            if upload is None or not upload.stream.read(1):
+                return jsonify({'success': False, 'error': 'No image data provided'}), 400
+            upload.stream.seek(0)
+            # Werkzeug spools large uploads to a temp file; stream it to disk
+            image_data = upload.stream
+        elif content_type.startswith('application/octet-stream'):
+            image_data = request.get_data(cache=False)
+            if not image_data:
+                return jsonify({'success': False, 'error': 'No image data provided'}), 400
+        else:
+            # Legacy JSON body with a base64 data URI
+            data = request.json
+            image_data_b64 = data.get('image', '').partition(',')[2]  # Remove data:image/jpeg;base64, prefix
+            image_data = pybase64.b64decode(image_data_b64, validate=True)
+            if not image_data:
+                return jsonify({'success': False, 'error': 'No image data provided'}), 400
         
         # Store image
         if image_manager:
@@ -68,18 +131,10 @@ def get_items():
     """Get list of captured items."""
     try:
         if image_manager:
-            items = image_manager.get_recent_images(limit=20)
-            return jsonify({
-                'success': True,
-                'items': [{
-                    'id': item.id,
-                    'filename': item.filename,
-                    'name': item.name,
-                    'category': item.category,
-                    'state': item.state,
-                    'captured_at': item.captured_at.isoformat()
-                } for item in items]
-            })
+            # Wrap the cached, pre-encoded items array without re-serializing it
+            items_json = image_manager.get_recent_items_json(limit=20)
+            return Response(b'{"success":true,"items":' + items_json + b'}',
+                            mimetype='application/json')
         else:
             return jsonify({'success': False, 'error': 'Image manager not initialized'}), 500
     except Exception as e:
@@ -131,7 +186,7 @@ def start_session():
         
         if not audio_handler:
             audio_handler = AudioHandler()
-            audio_handler.start_input()
+            audio_handler.start_input(_loop)
             audio_handler.start_output()
         
         # Create snapshot tool
@@ -150,8 +205,8 @@ def start_session():
             print(f"Received text: {text}")
             # Could send to frontend via WebSocket/SSE
         
-        async def on_tool_call(tool_call):
-            await handle_tool_call(tool_call)
+        def on_tool_call(tool_call):
+            run_in_background(handle_tool_call(tool_call))
         
         def on_state_change(state):
             update_reed_orb_state(state)
@@ -162,22 +217,29 @@ def start_session():
         live_client.on_state_change = on_state_change
         
         # Connect to Live API (run in background)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.create_task(live_client.connect(tools=[snapshot_tool]))
+        run_in_background(live_client.connect(tools=[snapshot_tool]))
         
-        # Set up video frame callback
-        async def send_frame(frame):
-            await send_video_frame(frame)
+        # Set up video frame callback (only the newest frames matter at 1 FPS)
+        frame_queue = create_on_loop(lambda: asyncio.Queue(maxsize=FRAME_QUEUE_SIZE))
         
-        video_capture.on_frame = lambda frame: loop.create_task(send_frame(frame))
+        async def send_frames():
+            while True:
+                await send_video_frame(await frame_queue.get())
+        
+        run_in_background(send_frames())
+        video_capture.on_frame = lambda frame: _loop.call_soon_threadsafe(put_latest, frame_queue, frame)
         
         # Set up audio input callback
-        async def send_audio(audio):
-            if live_client and live_client.is_connected:
-                await live_client.send_audio(audio)
+        audio_queue = create_on_loop(lambda: asyncio.Queue(maxsize=AUDIO_QUEUE_SIZE))
+        
+        async def send_audio():
+            while True:
+                audio = await audio_queue.get()
+                if live_client and live_client.is_connected:
+                    await live_client.send_audio(audio)
         
-        audio_handler.on_audio_input = lambda audio: loop.create_task(send_audio(audio))
+        run_in_background(send_audio())
+        audio_handler.on_audio_input = lambda audio: _loop.call_soon_threadsafe(put_latest, audio_queue, audio)
         
         return jsonify({'success': True, 'message': 'Session started'})
         
@@ -190,8 +252,11 @@ def stop_session():
     global live_client, video_capture, audio_handler
     
     try:
+        for future in list(_session_futures):
+            future.cancel()
+        
         if live_client:
-            asyncio.create_task(live_client.disconnect())
+            asyncio.run_coroutine_threadsafe(live_client.disconnect(), _loop)
             live_client = None
         
         if video_capture:
@@ -206,19 +271,29 @@ def stop_session():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def run_in_background(coro):
+    """Schedule a coroutine on the background loop as part of the current session."""
+    future = asyncio.run_coroutine_threadsafe(coro, _loop)
+    _session_futures.add(future)
+    future.add_done_callback(_session_futures.discard)
+    future.add_done_callback(log_background_error)
+    return future
+
+def log_background_error(future):
+    """Report an exception raised by a background coroutine."""
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Error in background task: {future.exception()!r}")
+
+def put_latest(queue, item):
+    """Put an item on a bounded queue, dropping the oldest entry if it is full."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(item)
+
 async def handle_tool_call(tool_call):
     """Handle tool calls from Live API."""
     if live_client and video_capture:
-        response = await handle_snapshot_tool_call(tool_call, video_capture)
-        
-        # Store the captured image
-        if response and response.get('function_response', {}).get('response', {}).get('snapshot_captured'):
-            image_data_b64 = response['function_response']['response'].get('image_data')
-            if image_data_b64 and image_manager:
-                import base64
-                image_data = base64.b64decode(image_data_b64)
-                image_record = image_manager.store_image(image_data)
-                print(f"Snapshot stored: {image_record.id}")
+        response = await handle_snapshot_tool_call(tool_call, video_capture, on_snapshot=schedule_snapshot_store)
         
         # Send response back to Live API
         if live_client.session:
@@ -227,6 +302,25 @@ async def handle_tool_call(tool_call):
             except Exception as e:
                 print(f"Error sending tool response: {e}")
 
+async def schedule_snapshot_store(image_data):
+    """Store a tool-call snapshot in the background so it overlaps with the tool response."""
+    if not image_manager:
+        return
+    await _store_semaphore.acquire()
+    task = asyncio.create_task(store_tool_snapshot(image_data))
+    _store_tasks.add(task)
+    task.add_done_callback(_store_tasks.discard)
+
+async def store_tool_snapshot(image_data):
+    """Store a tool-call snapshot on the default thread pool."""
+    try:
+        image_record = await asyncio.to_thread(image_manager.store_image, image_data)
+        print(f"Snapshot stored: {image_record.id}")
+    except Exception as e:
+        print(f"Error storing snapshot: {e}")
+    finally:
+        _store_semaphore.release()
+
 def update_reed_orb_state(state):
     """Update Reed orb state (called via WebSocket or SSE)."""
     # This would send state updates to frontend via WebSocket or Server-Sent Events
@@ -234,18 +328,13 @@ def update_reed_orb_state(state):
 
 async def send_video_frame(frame):
     """Send video frame to Live API."""
-    import cv2
-    import numpy as np
-    
     if live_client and live_client.is_connected:
         try:
-            # Convert RGB to BGR for OpenCV
-            frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-            # Resize to required resolution
-            frame_resized = cv2.resize(frame_bgr, (768, 768))
-            # Encode as JPEG
-            _, buffer = cv2.imencode('.jpg', frame_resized, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_bytes = buffer.tobytes()
+            # Resize to required resolution (resize and encode run without
+            # awaiting in between, so overlapping calls never share the buffer)
+            frame_resized = _resize_frame(frame)
+            # Encode as JPEG straight from the camera's BGR layout
+            frame_bytes = _encode_frame(frame_resized)
             await live_client.send_video_frame(frame_bytes, "image/jpeg")
         except Exception as e:
             print(f"Error sending video frame: {e}")
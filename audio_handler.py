@@ -1,7 +1,8 @@
 """Audio input/output handling for Live API."""
 import pyaudio
-import numpy as np
 import asyncio
+import threading
+import time
 from typing import Optional, Callable
 import config
 
@@ -17,12 +18,20 @@ class AudioHandler:
         self.is_recording = False
         self.is_playing = False
         self.is_muted = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._input_queue: Optional[asyncio.Queue] = None
+        self._unmute_event: Optional[asyncio.Event] = None
+        self._reader_thread: Optional[threading.Thread] = None
         
         # Callbacks
         self.on_audio_input: Optional[Callable] = None
         
-    def start_input(self):
-        """Start audio input stream."""
+    def start_input(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start audio input stream.
+        
+        Args:
+            loop: Event loop that runs the input callback (defaults to the current loop)
+        """
         if self.input_stream:
             return
         
@@ -34,11 +43,20 @@ class AudioHandler:
             frames_per_buffer=config.AUDIO_CHUNK_SIZE
         )
         self.is_recording = True
-        asyncio.create_task(self._input_loop())
+        self._loop = loop or asyncio.get_event_loop()
+        
+        # The input loop creates its queue and event and starts the reader on
+        # the loop's thread
+        asyncio.run_coroutine_threadsafe(self._input_loop(), self._loop)
     
     def stop_input(self):
         """Stop audio input stream."""
         self.is_recording = False
+        if self._reader_thread:
+            self._reader_thread.join(timeout=1.0)
+            self._reader_thread = None
+        # Release the input loop if it is parked on mute so it can exit
+        self._set_unmute_event(True)
         if self.input_stream:
             self.input_stream.stop_stream()
             self.input_stream.close()
@@ -69,10 +87,18 @@ class AudioHandler:
     def mute(self):
         """Mute audio input."""
         self.is_muted = True
+        self._set_unmute_event(False)
     
     def unmute(self):
         """Unmute audio input."""
         self.is_muted = False
+        self._set_unmute_event(True)
+    
+    def _set_unmute_event(self, unmuted: bool):
+        """Set or clear the input loop's unmute event from any thread."""
+        if self._loop and self._unmute_event:
+            action = self._unmute_event.set if unmuted else self._unmute_event.clear
+            self._loop.call_soon_threadsafe(action)
     
     def play_audio(self, audio_data: bytes):
         """Play audio data through output stream.
@@ -81,24 +107,52 @@ class AudioHandler:
             audio_data: Raw PCM audio bytes (24kHz, 16-bit, little-endian)
         """
         if self.output_stream and self.is_playing:
-            # Convert bytes to numpy array
-            audio_array = np.frombuffer(audio_data, dtype=np.int16)
-            self.output_stream.write(audio_array.tobytes())
+            # 16-bit samples, so each frame is 2 bytes per channel
+            num_frames = len(audio_data) // (2 * config.AUDIO_CHANNELS)
+            self.output_stream.write(audio_data, num_frames)
+    
+    def _blocking_reader(self):
+        """Read audio chunks on a worker thread and queue them for the event loop."""
+        while self.is_recording and self.input_stream:
+            try:
+                audio_data = self.input_stream.read(
+                    config.AUDIO_CHUNK_SIZE,
+                    exception_on_overflow=False
+                )
+            except Exception as e:
+                print(f"Error reading audio: {e}")
+                time.sleep(0.01)
+                continue
+            # Keep draining the device while muted but drop the audio
+            if self.is_muted:
+                continue
+            self._loop.call_soon_threadsafe(self._input_queue.put_nowait, audio_data)
+        
+        # Wake the input loop so it can exit
+        self._loop.call_soon_threadsafe(self._input_queue.put_nowait, None)
     
     async def _input_loop(self):
-        """Internal loop for capturing audio input."""
-        while self.is_recording:
-            if self.input_stream and not self.is_muted:
-                try:
-                    audio_data = self.input_stream.read(
-                        config.AUDIO_CHUNK_SIZE,
-                        exception_on_overflow=False
-                    )
-                    if self.on_audio_input:
-                        self.on_audio_input(audio_data)
-                except Exception as e:
-                    print(f"Error reading audio: {e}")
-            await asyncio.sleep(0.01)  # Small delay to prevent busy waiting
+        """Internal loop for delivering captured audio input."""
+        # Created here because before Python 3.10 asyncio objects bind to the
+        # loop of the thread that constructs them
+        self._input_queue = asyncio.Queue()
+        self._unmute_event = asyncio.Event()
+        # Also start set if input was already stopped, so the loop can exit
+        if not self.is_muted or not self.is_recording:
+            self._unmute_event.set()
+        
+        # PyAudio reads block, so they run on a worker thread that feeds the loop
+        self._reader_thread = threading.Thread(target=self._blocking_reader, daemon=True)
+        self._reader_thread.start()
+        
+        while True:
+            # Park while muted instead of polling
+            await self._unmute_event.wait()
+            audio_data = await self._input_queue.get()
+            if audio_data is None:
+                break
+            if self.on_audio_input and not self.is_muted:
+                self.on_audio_input(audio_data)
     
     def cleanup(self):
         """Clean up audio resources."""
@@ -3,14 +3,26 @@
 Script to combine all corrected documentation text files into a single master JSON document.
 """
 
-import json
+import orjson
 import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
 TEXT_DIR = "extracted_content/text_files"
 OUTPUT_FILE = "extracted_content/master.doc"
 
+# Worker threads used to read and scan text files ahead of the writer
+MAX_WORKERS = 32
+
+# Number of lines after the URL line that are searched for a title
+TITLE_SEARCH_LINES = 14
+
+URL_LINE_RE = re.compile(r'^URL: (.*)$', re.M)
+URL_PREFIX_RE = re.compile(r'^URL:', re.M)
+
 def read_text_file(filepath):
     """Read a text file and return its content."""
     try:
@@ -23,43 +35,86 @@ def read_text_file(filepath):
 
 def extract_url_from_content(content):
     """Extract URL from the first line of content if present."""
-    lines = content.split('\n')
-    for line in lines:
-        if line.startswith('URL: '):
-            return line.replace('URL: ', '').strip()
+    match = URL_LINE_RE.search(content)
+    if match:
+        return match.group(1).strip()
     return None
 
 def extract_title_from_content(content):
     """Try to extract a title from the content."""
-    lines = content.split('\n')
     # Look for title-like lines (usually after URL and separator)
-    for i, line in enumerate(lines):
-        if line.startswith('URL:'):
-            # Title is usually a few lines after URL
-            for j in range(i+1, min(i+15, len(lines))):
-                if lines[j].strip() and not lines[j].startswith('=') and len(lines[j].strip()) < 200:
-                    potential_title = lines[j].strip()
-                    if potential_title and not potential_title.startswith('Home'):
-                        return potential_title
+    for match in URL_PREFIX_RE.finditer(content):
+        # Title is usually a few lines after URL; scan them without splitting the whole file
+        pos = content.find('\n', match.end())
+        if pos == -1:
+            break
+        pos += 1
+        for _ in range(TITLE_SEARCH_LINES):
+            if pos > len(content):
+                break
+            end = content.find('\n', pos)
+            if end == -1:
+                end = len(content)
+            line = content[pos:end]
+            potential_title = line.strip()
+            if potential_title and not line.startswith('=') and len(potential_title) < 200:
+                if not potential_title.startswith('Home'):
+                    return potential_title
+            pos = end + 1
     return None
 
+def process_one(text_file):
+    """Read a text file and build its page entry, or return None if unreadable."""
+    filename = text_file.name
+    print(f"Processing: {filename}")
+    
+    content = read_text_file(text_file)
+    if content is None:
+        return None
+    
+    # Extract URL and title
+    url = extract_url_from_content(content)
+    title = extract_title_from_content(content)
+    
+    return {
+        "filename": filename,
+        "url": url,
+        "title": title,
+        "content": content,
+        "content_length": len(content),
+        "line_count": content.count('\n') + 1
+    }
+
+def iter_pages(text_files):
+    """Yield page entries in file order, reading ahead on a thread pool."""
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Cap the read-ahead so finished pages don't pile up in memory
+        pending = deque()
+        for text_file in text_files:
+            pending.append(executor.submit(process_one, text_file))
+            if len(pending) >= MAX_WORKERS * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def indent_json(data, level):
+    """Indent every line after the first of an orjson dump by `level` spaces."""
+    return data.replace(b'\n', b'\n' + b' ' * level)
+
 def main():
     """Create master JSON document from all text files."""
     print("Creating master documentation JSON...")
     
-    master_doc = {
-        "metadata": {
-            "created_at": datetime.now().isoformat(),
-            "source": "Gemini 2.5 Flash Live API Documentation",
-            "main_page": "https://docs.cloud.google.com/vertex-ai/generative-ai/docs/models/gemini/2-5-flash-live-api",
-            "total_pages": 0,
-            "corrections_applied": {
-                "concurrent_sessions": "Corrected from 5,000 to 1,000",
-                "code_execution": "Removed (not supported)",
-                "rag_engine": "Removed (not supported)"
-            }
-        },
-        "pages": []
+    metadata = {
+        "created_at": datetime.now().isoformat(),
+        "source": "Gemini 2.5 Flash Live API Documentation",
+        "main_page": "https://docs.cloud.google.com/vertex-ai/generative-ai/docs/models/gemini/2-5-flash-live-api",
+        "total_pages": 0,
+        "corrections_applied": {
+            "concurrent_sessions": "Corrected from 5,000 to 1,000",
+            "code_execution": "Removed (not supported)",
+            "rag_engine": "Removed (not supported)"
+        }
     }
     
     # Get all text files
@@ -73,39 +128,28 @@ def main():
     
     print(f"Found {len(text_files)} text files")
     
-    for text_file in text_files:
-        filename = text_file.name
-        print(f"Processing: {filename}")
-        
-        content = read_text_file(text_file)
-        if content is None:
-            continue
+    # Stream pages to disk in file order so only the read-ahead window is held in memory.
+    # Metadata is written last because total_pages is only known at the end.
+    print(f"\nWriting master document to {OUTPUT_FILE}...")
+    total_pages = 0
+    with open(OUTPUT_FILE, 'wb') as f:
+        f.write(b'{\n  "pages": [')
         
-        # Extract URL and title
-        url = extract_url_from_content(content)
-        title = extract_title_from_content(content)
+        for page_entry in iter_pages(text_files):
+            if page_entry is None:
+                continue
+            
+            f.write(b',\n    ' if total_pages else b'\n    ')
+            f.write(indent_json(orjson.dumps(page_entry, option=orjson.OPT_INDENT_2), 4))
+            total_pages += 1
         
-        # Create page entry
-        page_entry = {
-            "filename": filename,
-            "url": url,
-            "title": title,
-            "content": content,
-            "content_length": len(content),
-            "line_count": len(content.split('\n'))
-        }
-        
-        master_doc["pages"].append(page_entry)
-    
-    master_doc["metadata"]["total_pages"] = len(master_doc["pages"])
-    
-    # Write to JSON file
-    print(f"\nWriting master document to {OUTPUT_FILE}...")
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(master_doc, f, ensure_ascii=False, indent=2)
+        metadata["total_pages"] = total_pages
+        f.write(b'\n  ],\n  "metadata": ')
+        f.write(indent_json(orjson.dumps(metadata, option=orjson.OPT_INDENT_2), 2))
+        f.write(b'\n}')
     
     print("Master document created successfully!")
-    print(f"   Total pages: {master_doc['metadata']['total_pages']}")
+    print(f"   Total pages: {total_pages}")
     print(f"   Output file: {OUTPUT_FILE}")
     print(f"   File size: {os.path.getsize(OUTPUT_FILE) / 1024 / 1024:.2f} MB")
 
@@ -1,17 +1,56 @@
 """Image storage and management system."""
 import os
+import atexit
 import base64
+import shutil
+import itertools
+import threading
+import time
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from typing import Optional, List, Dict, Any, BinaryIO, Tuple, Union
+import orjson
+from sqlalchemy import create_engine, event, insert, select, Column, Integer, String, DateTime, Text, Index, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
 from PIL import Image
 import io
 import config
 
 Base = declarative_base()
 
+# Chunk size used when streaming uploaded images to disk
+_COPY_BUFSIZE = 1 << 20
+
+# Monotonic source of unique snapshot filenames, seeded with the start time in ms
+_filename_counter = itertools.count(int(time.time() * 1000))
+
+# Write-behind batching for snapshot inserts
+_FLUSH_BATCH_SIZE = 64
+_FLUSH_INTERVAL = 0.2  # seconds
+
+# How long serialized recent-item listings are reused
+_RECENT_CACHE_TTL = 0.5  # seconds
+
+# Applied to every new SQLite connection (WAL suits the append-mostly workload)
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply performance pragmas to a new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 class CapturedImage(Base):
     """Database model for captured images."""
@@ -25,9 +64,32 @@ class CapturedImage(Base):
     state = Column(String(50), default='CAPTURED')  # CAPTURED, USED, DISCARDED
     captured_at = Column(DateTime, default=datetime.utcnow)
     image_metadata = Column(Text, nullable=True)  # JSON string for additional metadata
+    
+    __table_args__ = (
+        Index('ix_captured_images_captured_at', captured_at.desc()),
+    )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the fields exposed by the items API."""
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'name': self.name,
+            'category': self.category,
+            'state': self.state,
+            'captured_at': self.captured_at.isoformat()
+        }
 
 class ImageManager:
-    """Manages image storage and retrieval."""
+    """Manages image storage and retrieval.
+    
+    Image IDs are assigned in-process, so only one ImageManager (in one
+    process) may write to a given database at a time. A queued row whose ID
+    turns out to be taken by another writer is not stored; flush() raises.
+    """
+    
+    # Core insert used for batched writes, bypassing the ORM unit of work
+    _INSERT = insert(CapturedImage.__table__)
     
     def __init__(self, db_url: str = None):
         """Initialize image manager.
@@ -37,22 +99,137 @@ class ImageManager:
         """
         self.db_url = db_url or config.DATABASE_URL
         self.engine = create_engine(self.db_url)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _set_sqlite_pragmas)
         Base.metadata.create_all(self.engine)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        # create_all skips indexes on tables that already exist
+        for index in CapturedImage.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        # Thread-local sessions that keep loaded attributes after commit;
+        # call remove_session() when a unit of work (e.g. a request) ends
+        self.SessionLocal = scoped_session(sessionmaker(bind=self.engine, expire_on_commit=False))
         
         # Ensure storage directory exists
         os.makedirs(config.IMAGE_STORAGE_DIR, exist_ok=True)
+        
+        # IDs are assigned here rather than by the database so that queued
+        # records can be returned to callers before they are committed; this
+        # assumes no other writer is inserting into the same database
+        with self.engine.connect() as conn:
+            max_id = conn.execute(select(func.max(CapturedImage.id))).scalar()
+        self._next_id = itertools.count((max_id or 0) + 1)
+        
+        # Pending inserts, committed in batches by the flush thread
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+        # The flush thread is a daemon, so commit whatever is still queued on exit
+        atexit.register(self.close)
+        
+        # Encoded recent-items JSON keyed by limit
+        self._recent_cache: Dict[int, Tuple[float, bytes]] = {}
     
     def _get_session(self) -> Session:
-        """Get a database session."""
+        """Get the current thread's database session."""
         return self.SessionLocal()
     
-    def store_image(self, image_data: bytes, name: Optional[str] = None, 
+    def remove_session(self):
+        """Close and discard the current thread's database session."""
+        self.SessionLocal.remove()
+    
+    def _flush_loop(self):
+        """Background loop that commits queued inserts in batches."""
+        while True:
+            with self._pending_cond:
+                self._pending_cond.wait_for(lambda: self._pending)
+                self._pending_cond.wait_for(
+                    lambda: len(self._pending) >= _FLUSH_BATCH_SIZE,
+                    timeout=_FLUSH_INTERVAL
+                )
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing image records: {e}")
+    
+    def flush(self):
+        """Commit all queued image records to the database.
+        
+        If the commit fails the records stay queued for the next flush.
+        """
+        with self._write_lock:
+            with self._pending_cond:
+                records, self._pending = self._pending, []
+            if not records:
+                return
+            
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(self._INSERT, records)
+                return
+            except Exception as e:
+                print(f"Error flushing {len(records)} image records, retrying one at a time: {e}")
+            
+            # One bad row must not take the valid rows of its batch down with it
+            failed, taken_ids = self._insert_each(records)
+            if failed:
+                # Put the rows back ahead of anything queued meanwhile
+                with self._pending_cond:
+                    self._pending[:0] = failed
+            if taken_ids:
+                raise RuntimeError(f"Image record IDs {taken_ids} are already in use; "
+                                   f"only one ImageManager may write to {self.db_url}")
+            if failed:
+                raise RuntimeError(f"{len(failed)} image records could not be committed")
+    
+    def _insert_each(self, records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """Insert records one transaction at a time.
+        
+        Args:
+            records: Queued row dictionaries
+            
+        Returns:
+            Tuple of (records to retry, IDs already taken by another writer)
+        """
+        failed = []
+        taken_ids = []
+        for row in records:
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(self._INSERT, [row])
+            except IntegrityError as e:
+                # The ID was already returned to the caller, so storing the row
+                # under another ID would point clients at the wrong record, and
+                # retrying can never succeed
+                print(f"Error inserting image record {row['id']} ({row['filepath']}): "
+                      f"ID already in use by another writer: {e}")
+                taken_ids.append(row['id'])
+            except Exception as e:
+                print(f"Error inserting image record {row['id']}: {e}")
+                failed.append(row)
+        return failed, taken_ids
+    
+    def _flush_for_read(self):
+        """Commit queued records before a read without letting write errors block it."""
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error flushing image records: {e}")
+    
+    def close(self):
+        """Commit any queued image records before shutdown."""
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Error flushing image records on close: {e}")
+    
+    def store_image(self, image_data: Union[bytes, BinaryIO], name: Optional[str] = None, 
                    category: Optional[str] = None, metadata: Optional[Dict] = None) -> CapturedImage:
         """Store a captured image.
         
         Args:
-            image_data: Image bytes (JPEG/PNG)
+            image_data: Image bytes (JPEG/PNG) or a readable binary stream
             name: Optional name for the image
             category: Optional category
             metadata: Optional metadata dictionary
@@ -60,32 +237,40 @@ class ImageManager:
         Returns:
             CapturedImage instance
         """
-        # Generate filename
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')
-        filename = f"snapshot_{timestamp}.jpg"
-        filepath = os.path.join(config.IMAGE_STORAGE_DIR, filename)
+        # Generate a filename, skipping any already used (e.g. by another
+        # process whose counter was seeded close to ours)
+        while True:
+            filename = f"snapshot_{next(_filename_counter):016x}.jpg"
+            filepath = os.path.join(config.IMAGE_STORAGE_DIR, filename)
+            try:
+                f = open(filepath, 'xb', buffering=_COPY_BUFSIZE)
+                break
+            except FileExistsError:
+                continue
         
         # Save image file
-        with open(filepath, 'wb') as f:
-            f.write(image_data)
+        with f:
+            if isinstance(image_data, (bytes, bytearray, memoryview)):
+                f.write(image_data)
+            else:
+                shutil.copyfileobj(image_data, f, length=_COPY_BUFSIZE)
         
-        # Store in database
-        db = self._get_session()
-        try:
-            image_record = CapturedImage(
-                filename=filename,
-                filepath=filepath,
-                name=name,
-                category=category,
-                state='CAPTURED',
-                image_metadata=str(metadata) if metadata else None
-            )
-            db.add(image_record)
-            db.commit()
-            db.refresh(image_record)
-            return image_record
-        finally:
-            db.close()
+        # Queue the row for the next batched database commit
+        row = {
+            'id': next(self._next_id),
+            'filename': filename,
+            'filepath': filepath,
+            'name': name,
+            'category': category,
+            'state': 'CAPTURED',
+            'captured_at': datetime.utcnow(),
+            'image_metadata': str(metadata) if metadata else None
+        }
+        with self._pending_cond:
+            self._pending.append(row)
+            self._pending_cond.notify()
+        self._recent_cache = {}
+        return CapturedImage(**row)
     
     def update_image(self, image_id: int, name: Optional[str] = None,
                     category: Optional[str] = None, state: Optional[str] = None) -> Optional[CapturedImage]:
@@ -100,22 +285,20 @@ class ImageManager:
         Returns:
             Updated CapturedImage instance, or None if not found
         """
+        self._flush_for_read()
         db = self._get_session()
-        try:
-            image = db.query(CapturedImage).filter(CapturedImage.id == image_id).first()
-            if image:
-                if name is not None:
-                    image.name = name
-                if category is not None:
-                    image.category = category
-                if state is not None:
-                    image.state = state
-                db.commit()
-                db.refresh(image)
-                return image
-            return None
-        finally:
-            db.close()
+        image = db.query(CapturedImage).filter(CapturedImage.id == image_id).first()
+        if image:
+            if name is not None:
+                image.name = name
+            if category is not None:
+                image.category = category
+            if state is not None:
+                image.state = state
+            db.commit()
+            self._recent_cache = {}
+            return image
+        return None
     
     def get_image(self, image_id: int) -> Optional[CapturedImage]:
         """Get image by ID.
@@ -126,11 +309,9 @@ class ImageManager:
         Returns:
             CapturedImage instance, or None if not found
         """
+        self._flush_for_read()
         db = self._get_session()
-        try:
-            return db.query(CapturedImage).filter(CapturedImage.id == image_id).first()
-        finally:
-            db.close()
+        return db.query(CapturedImage).filter(CapturedImage.id == image_id).first()
     
     def get_last_image(self) -> Optional[CapturedImage]:
         """Get the most recently captured image.
@@ -138,11 +319,9 @@ class ImageManager:
         Returns:
             Most recent CapturedImage instance, or None if no images
         """
+        self._flush_for_read()
         db = self._get_session()
-        try:
-            return db.query(CapturedImage).order_by(CapturedImage.captured_at.desc()).first()
-        finally:
-            db.close()
+        return db.query(CapturedImage).order_by(CapturedImage.captured_at.desc()).first()
     
     def get_recent_images(self, limit: int = 10) -> List[CapturedImage]:
         """Get recent captured images.
@@ -153,11 +332,29 @@ class ImageManager:
         Returns:
             List of CapturedImage instances
         """
+        self._flush_for_read()
         db = self._get_session()
-        try:
-            return db.query(CapturedImage).order_by(CapturedImage.captured_at.desc()).limit(limit).all()
-        finally:
-            db.close()
+        return db.query(CapturedImage).order_by(CapturedImage.captured_at.desc()).limit(limit).all()
+    
+    def get_recent_items_json(self, limit: int = 10) -> bytes:
+        """Get recent captured images as an encoded JSON array for the items API.
+        
+        Results are cached briefly so that frequent polling does not hit the
+        database; the cache is cleared whenever an image is stored or updated.
+        
+        Args:
+            limit: Maximum number of images to return
+            
+        Returns:
+            UTF-8 JSON bytes
+        """
+        cached = self._recent_cache.get(limit)
+        if cached and time.monotonic() - cached[0] < _RECENT_CACHE_TTL:
+            return cached[1]
+        
+        items_json = orjson.dumps([image.to_dict() for image in self.get_recent_images(limit)])
+        self._recent_cache[limit] = (time.monotonic(), items_json)
+        return items_json
     
     def mark_as_used(self, image_id: int) -> bool:
         """Mark an image as used.
@@ -7,6 +7,13 @@ from google import genai
 from google.genai import types
 import config
 
+# Outgoing microphone audio is coalesced into sends of at least this duration
+AUDIO_FLUSH_MS = 100
+AUDIO_FRAME_BYTES = 2 * config.AUDIO_CHANNELS  # 16-bit PCM
+AUDIO_FLUSH_BYTES = config.AUDIO_INPUT_RATE * AUDIO_FRAME_BYTES * AUDIO_FLUSH_MS // 1000
+# Oldest buffered audio is dropped beyond this if sends fall behind
+AUDIO_MAX_BUFFER_BYTES = config.AUDIO_INPUT_RATE * AUDIO_FRAME_BYTES
+
 
 class LiveAPIClient:
     """Client for managing Live API WebSocket connections."""
@@ -29,6 +36,11 @@ class LiveAPIClient:
         self.is_speaking = False
         self.is_listening = False
         
+        # Pending microphone audio, drained by the audio flusher task
+        self._audio_buf = bytearray()
+        self._audio_ready: Optional[asyncio.Event] = None
+        self._audio_flush_task: Optional[asyncio.Task] = None
+        
         # Callbacks
         self.on_audio_received: Optional[Callable] = None
         self.on_text_received: Optional[Callable] = None
@@ -64,11 +76,16 @@ class LiveAPIClient:
         if self.on_state_change:
             self.on_state_change("connected")
         
-        # Start receiving messages
+        # Start receiving messages and sending buffered audio
         asyncio.create_task(self._receive_messages())
+        self._audio_ready = asyncio.Event()
+        self._audio_flush_task = asyncio.create_task(self._audio_flusher())
     
     async def disconnect(self):
         """Disconnect from the Live API session."""
+        if self._audio_flush_task:
+            self._audio_flush_task.cancel()
+            self._audio_flush_task = None
         if self.session:
             await self.session.close()
             self.is_connected = False
@@ -76,7 +93,10 @@ class LiveAPIClient:
                 self.on_state_change("disconnected")
     
     async def send_audio(self, audio_data: bytes):
-        """Send audio data to the Live API.
+        """Queue audio data to be sent to the Live API.
+        
+        Audio is buffered and sent by the flusher task in chunks of at least
+        AUDIO_FLUSH_MS, so this does not wait on the network.
         
         Args:
             audio_data: Raw PCM audio bytes (16kHz, 16-bit, little-endian)
@@ -89,15 +109,35 @@ class LiveAPIClient:
             if self.on_state_change:
                 self.on_state_change("listening")
         
-        try:
-            await self.session.send(
-                input={
-                    "data": audio_data,
-                    "mime_type": "audio/pcm"
-                }
-            )
-        except Exception as e:
-            print(f"Error sending audio: {e}")
+        self._audio_buf += audio_data
+        overflow = len(self._audio_buf) - AUDIO_MAX_BUFFER_BYTES
+        if overflow > 0:
+            # Drop the oldest audio, keeping whole sample frames
+            overflow += -overflow % AUDIO_FRAME_BYTES
+            del self._audio_buf[:overflow]
+        self._audio_ready.set()
+    
+    async def _audio_flusher(self):
+        """Send buffered audio, coalescing small chunks into larger sends."""
+        while self.is_connected:
+            await self._audio_ready.wait()
+            if len(self._audio_buf) < AUDIO_FLUSH_BYTES:
+                # Give small chunks a moment to accumulate
+                await asyncio.sleep(AUDIO_FLUSH_MS / 1000)
+            self._audio_ready.clear()
+            if not self._audio_buf:
+                continue
+            
+            audio_data, self._audio_buf = bytes(self._audio_buf), bytearray()
+            try:
+                await self.session.send(
+                    input={
+                        "data": audio_data,
+                        "mime_type": "audio/pcm"
+                    }
+                )
+            except Exception as e:
+                print(f"Error sending audio: {e}")
     
     async def send_video_frame(self, frame_data: bytes, mime_type: str = "image/jpeg"):
         """Send a video frame to the Live API.
@@ -143,57 +183,66 @@ class LiveAPIClient:
         if not self.session:
             return
         
+        # Callbacks are set before connect(), so bind them once for the loop
+        on_audio = self.on_audio_received
+        on_text = self.on_text_received
+        on_tr = self.on_transcription
+        on_state = self.on_state_change
+        on_tool = self.on_tool_call
+        
+        def set_speaking(speaking: bool, state: str):
+            self.is_speaking = speaking
+            if speaking:
+                self.is_listening = False
+            if on_state:
+                on_state(state)
+        
         try:
             async for message in self.session.receive():
                 # Handle server content
-                if hasattr(message, 'server_content') and message.server_content:
-                    sc = message.server_content
-                    
+                sc = getattr(message, 'server_content', None)
+                if sc:
                     # Handle input transcription
-                    if hasattr(sc, 'input_transcription') and sc.input_transcription:
-                        if self.on_transcription:
-                            self.on_transcription(sc.input_transcription, "input")
+                    transcription = getattr(sc, 'input_transcription', None)
+                    if transcription and on_tr:
+                        on_tr(transcription, "input")
                     
                     # Handle output transcription
-                    if hasattr(sc, 'output_transcription') and sc.output_transcription:
-                        if self.on_transcription:
-                            self.on_transcription(sc.output_transcription, "output")
+                    transcription = getattr(sc, 'output_transcription', None)
+                    if transcription and on_tr:
+                        on_tr(transcription, "output")
                     
                     # Handle model turn (audio/text output)
-                    if hasattr(sc, 'model_turn') and sc.model_turn:
-                        if hasattr(sc.model_turn, 'parts') and sc.model_turn.parts:
-                            for part in sc.model_turn.parts:
-                                # Handle audio
-                                if hasattr(part, 'inline_data') and part.inline_data:
-                                    if part.inline_data.mime_type == "audio/pcm":
-                                        if not self.is_speaking:
-                                            self.is_speaking = True
-                                            self.is_listening = False
-                                            if self.on_state_change:
-                                                self.on_state_change("speaking")
-                                        
-                                        if self.on_audio_received:
-                                            self.on_audio_received(part.inline_data.data)
+                    model_turn = getattr(sc, 'model_turn', None)
+                    parts = getattr(model_turn, 'parts', None) if model_turn else None
+                    if parts:
+                        for part in parts:
+                            # Handle audio
+                            inline_data = getattr(part, 'inline_data', None)
+                            if inline_data and inline_data.mime_type == "audio/pcm":
+                                if not self.is_speaking:
+                                    set_speaking(True, "speaking")
                                 
-                                # Handle text
-                                if hasattr(part, 'text') and part.text:
-                                    if self.on_text_received:
-                                        self.on_text_received(part.text)
+                                if on_audio:
+                                    on_audio(inline_data.data)
+                            
+                            # Handle text
+                            text = getattr(part, 'text', None)
+                            if text and on_text:
+                                on_text(text)
                     
                     # Check if generation is complete
-                    if hasattr(sc, 'generation_complete') and sc.generation_complete:
-                        self.is_speaking = False
-                        if self.on_state_change:
-                            self.on_state_change("idle")
+                    if getattr(sc, 'generation_complete', None):
+                        set_speaking(False, "idle")
                 
                 # Handle tool calls
-                if hasattr(message, 'tool_call') and message.tool_call:
-                    if self.on_tool_call:
-                        self.on_tool_call(message.tool_call)
+                tool_call = getattr(message, 'tool_call', None)
+                if tool_call and on_tool:
+                    on_tool(tool_call)
                         
         except Exception as e:
             print(f"Error receiving messages: {e}")
             self.is_connected = False
-            if self.on_state_change:
-                self.on_state_change("error")
+            if on_state:
+                on_state("error")
 
@@ -4,9 +4,10 @@ Web scraping script to extract text content from Google Cloud Vertex AI document
 Extracts content from the main page and all linked pages, saving each as both .txt and .json files.
 """
 
-import requests
-from bs4 import BeautifulSoup
-import json
+import asyncio
+import httpx
+from selectolax.lexbor import LexborHTMLParser
+import orjson
 import os
 import time
 from urllib.parse import urljoin, urlparse, unquote
@@ -20,80 +21,86 @@ OUTPUT_DIR = "extracted_content"
 TEXT_DIR = os.path.join(OUTPUT_DIR, "text_files")
 JSON_DIR = os.path.join(OUTPUT_DIR, "json_files")
 
-# Headers to mimic a browser request
+# Headers to mimic a browser request (no Connection header: HTTP/2 forbids it,
+# and the client keeps connections alive on its own)
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
     'Accept-Language': 'en-US,en;q=0.5',
     'Accept-Encoding': 'gzip, deflate',
-    'Connection': 'keep-alive',
 }
 
-# Delay between requests to be respectful
+# Minimum spacing between requests to the same host, to be respectful
 REQUEST_DELAY = 1.0
 
+# Number of pages fetched concurrently
+MAX_CONCURRENCY = 8
+
+# Safety limit on the number of pages scraped
+MAX_PAGES = 50
+
+# Characters that are unsafe in filenames, all mapped to '_'
+FILENAME_TRANSLATION = str.maketrans({c: '_' for c in '/\\<>:"|?*'})
+
+# Elements stripped before extracting page text
+NON_CONTENT_TAGS = ['script', 'style', 'nav', 'header', 'footer', 'aside']
+
+# Divs whose class names mark the main content container of a page
+CONTENT_DIV_SELECTOR = 'div[class*="content" i], div[class*="main" i], div[class*="article" i]'
+
+# A line break with any surrounding whitespace, including blank lines
+LINE_BREAK_RE = re.compile(r'\s*\n\s*')
+
+# Hashes of every link already returned by extract_links_from_tree, shared
+# across pages so each URL is handed to the crawler at most once
+_seen_fp: set[int] = set()
+
 
 def sanitize_filename(url):
     """Convert URL to a safe filename."""
-    # Extract path from URL
-    parsed = urlparse(url)
-    path = parsed.path.strip('/')
-    
-    # Replace slashes and special characters
-    filename = path.replace('/', '_').replace('\\', '_')
-    filename = re.sub(r'[<>:"|?*]', '_', filename)
-    filename = unquote(filename)
-    
-    # Remove hash fragments
-    if parsed.fragment:
-        filename = filename.replace('#' + parsed.fragment, '')
+    # Extract path from URL (urlparse already splits off any fragment)
+    path = urlparse(url).path.strip('/')
     
-    # Limit filename length
-    if len(filename) > 200:
-        filename = filename[:200]
-    
-    # Ensure it's not empty
-    if not filename:
-        filename = "index"
-    
-    return filename
+    # Replace slashes and special characters in one pass, limit the length,
+    # and ensure it's not empty
+    return unquote(path.translate(FILENAME_TRANSLATION))[:200] or "index"
+
 
+def find_main_content(tree):
+    """Return the main content node of a parsed page, or None."""
+    return tree.css_first('main') or tree.css_first('article') or tree.css_first(CONTENT_DIV_SELECTOR)
 
-def extract_text_from_soup(soup):
-    """Extract clean text content from BeautifulSoup object."""
+
+def extract_text_from_tree(tree):
+    """Extract clean text content from a parsed HTML tree."""
     # Remove script and style elements
-    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-        element.decompose()
+    tree.strip_tags(NON_CONTENT_TAGS)
     
     # Try to find main content area
-    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile('content|main|article', re.I))
+    main_content = find_main_content(tree)
     
     if main_content:
-        text = main_content.get_text(separator='\n', strip=True)
+        text = main_content.text(deep=True, separator='\n', strip=True)
     else:
-        text = soup.get_text(separator='\n', strip=True)
-    
-    # Clean up excessive whitespace
-    lines = []
-    for line in text.split('\n'):
-        line = line.strip()
-        if line:  # Only add non-empty lines
-            lines.append(line)
+        text = tree.body.text(deep=True, separator='\n', strip=True) if tree.body else ''
     
-    return '\n'.join(lines)
+    # Clean up excessive whitespace: strip every line and drop empty ones
+    return LINE_BREAK_RE.sub('\n', text).strip()
 
 
-def extract_links_from_soup(soup, base_url):
-    """Extract all relevant links from the page body."""
-    links = set()
+def extract_links_from_tree(tree, base_url):
+    """Extract relevant links from the page body, in document order.
+    
+    Links already returned for an earlier page are skipped.
+    """
+    links = []
     
     # Find main content area
-    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile('content|main|article', re.I))
-    search_area = main_content if main_content else soup
+    search_area = find_main_content(tree) or tree.root
     
     # Find all links in the content area
-    for a_tag in search_area.find_all('a', href=True):
-        href = a_tag['href']
+    for a_tag in search_area.css('a[href]'):
+        href = a_tag.attributes.get('href') or ''
         
         # Skip anchor-only links
         if href.startswith('#'):
@@ -106,30 +113,54 @@ def extract_links_from_soup(soup, base_url):
         # Only include docs.cloud.google.com links
         if 'docs.cloud.google.com' in parsed.netloc:
             # Remove fragments
-            clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
             if parsed.query:
-                clean_url += f"?{parsed.query}"
-            links.add(clean_url)
+                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{parsed.query}"
+            else:
+                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+            
+            fp = hash(clean_url)
+            if fp in _seen_fp:
+                continue
+            _seen_fp.add(fp)
+            links.append(clean_url)
     
     return links
 
 
-def fetch_page(url):
-    """Fetch a page and return BeautifulSoup object."""
+class HostRateLimiter:
+    """Spaces out request start times per host."""
+    
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = {}
+    
+    async def wait(self, host):
+        """Wait until the next request slot for host is available."""
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def fetch_page(session, url):
+    """Fetch a page and return its parsed HTML tree."""
     try:
         print(f"Fetching: {url}")
-        response = requests.get(url, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        
-        # Check if it's HTML
-        content_type = response.headers.get('Content-Type', '').lower()
-        if 'text/html' not in content_type:
-            print(f"  Skipping non-HTML content: {content_type}")
-            return None
+        # Stream so non-HTML bodies are never downloaded
+        async with session.stream('GET', url) as response:
+            response.raise_for_status()
+            
+            # Check if it's HTML
+            content_type = response.headers.get('Content-Type', '').lower()
+            if 'text/html' not in content_type:
+                print(f"  Skipping non-HTML content: {content_type}")
+                return None
+            
+            body = await response.aread()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        return soup
-    except requests.exceptions.RequestException as e:
+        return LexborHTMLParser(body)
+    except httpx.HTTPError as e:
         print(f"  Error fetching {url}: {e}")
         return None
     except Exception as e:
@@ -162,44 +193,44 @@ def save_content(url, text_content, metadata=None):
             "metadata": metadata or {}
         }
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
+        # orjson writes UTF-8 directly, like ensure_ascii=False
+        Path(json_path).write_bytes(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
         print(f"  Saved JSON: {json_path}")
     except Exception as e:
         print(f"  Error saving JSON file: {e}")
 
 
-def extract_title(soup):
-    """Extract page title from soup."""
-    title_tag = soup.find('title')
+def extract_title(tree):
+    """Extract page title from a parsed HTML tree."""
+    title_tag = tree.css_first('title')
     if title_tag:
-        return title_tag.get_text(strip=True)
+        return title_tag.text(strip=True)
     
-    h1_tag = soup.find('h1')
+    h1_tag = tree.css_first('h1')
     if h1_tag:
-        return h1_tag.get_text(strip=True)
+        return h1_tag.text(strip=True)
     
     return ""
 
 
-def scrape_page(url, visited_urls=None):
+async def scrape_page(session, url, visited_urls=None):
     """Scrape a single page and return its links."""
     if visited_urls is None:
         visited_urls = set()
     
     if url in visited_urls:
-        return set()
+        return []
     
     visited_urls.add(url)
     
     # Fetch the page
-    soup = fetch_page(url)
-    if not soup:
-        return set()
+    tree = await fetch_page(session, url)
+    if not tree:
+        return []
     
     # Extract content
-    text_content = extract_text_from_soup(soup)
-    title = extract_title(soup)
+    text_content = extract_text_from_tree(tree)
+    title = extract_title(tree)
     
     # Save content
     metadata = {
@@ -209,14 +240,68 @@ def scrape_page(url, visited_urls=None):
     save_content(url, text_content, metadata)
     
     # Extract links
-    links = extract_links_from_soup(soup, url)
-    
-    # Be respectful - delay between requests
-    time.sleep(REQUEST_DELAY)
+    links = extract_links_from_tree(tree, url)
     
     return links
 
 
+async def crawl(start_urls):
+    """Scrape pages concurrently starting from start_urls; return the visited URLs.
+    
+    The frontier is a FIFO queue with a separate set for O(1) membership
+    checks. Each page's links are queued when its fetch finishes, so with
+    several workers the order (and, under MAX_PAGES, the set) of scraped
+    pages depends on network timing and can differ between runs.
+    """
+    # Each crawl starts with an empty link filter
+    _seen_fp.clear()
+    visited_urls = set()
+    queued_urls = set(start_urls)
+    frontier = asyncio.Queue()
+    for url in start_urls:
+        frontier.put_nowait(url)
+    
+    limiter = HostRateLimiter(REQUEST_DELAY)
+    page_count = 0
+    
+    async def worker(session):
+        nonlocal page_count
+        while True:
+            current_url = await frontier.get()
+            try:
+                if current_url in visited_urls or page_count >= MAX_PAGES:
+                    continue
+                
+                page_count += 1
+                print(f"\n[{page_count}] Processing: {current_url}")
+                await limiter.wait(urlparse(current_url).netloc)
+                new_links = await scrape_page(session, current_url, visited_urls)
+                
+                # Add new links to visit list (only if they're relevant documentation pages)
+                for link in new_links:
+                    if link not in queued_urls and 'vertex-ai/generative-ai' in link:
+                        queued_urls.add(link)
+                        frontier.put_nowait(link)
+            except Exception as e:
+                # Keep the worker alive so the rest of the frontier still drains
+                print(f"  Error scraping {current_url}: {e}")
+            finally:
+                frontier.task_done()
+    
+    # One pooled HTTP/2 client, so concurrent fetches share a connection per host
+    async with httpx.AsyncClient(http2=True, headers=HEADERS, timeout=30,
+                                 follow_redirects=True) as session:
+        workers = [asyncio.create_task(worker(session)) for _ in range(MAX_CONCURRENCY)]
+        await frontier.join()
+        for task in workers:
+            task.cancel()
+    
+    if page_count >= MAX_PAGES:
+        print(f"\nReached maximum page limit ({MAX_PAGES}). Stopping.")
+    
+    return visited_urls
+
+
 def main():
     """Main scraping function."""
     print("Starting documentation scraping...")
@@ -227,10 +312,6 @@ def main():
     os.makedirs(TEXT_DIR, exist_ok=True)
     os.makedirs(JSON_DIR, exist_ok=True)
     
-    # Track visited URLs
-    visited_urls = set()
-    urls_to_visit = {MAIN_PAGE_URL}
-    
     # Known linked pages from the main page
     known_links = [
         "https://docs.cloud.google.com/vertex-ai/generative-ai/docs/learn/data-residency",
@@ -245,33 +326,8 @@ def main():
         "https://docs.cloud.google.com/vertex-ai/generative-ai/docs/model-reference/code-execution-api",
     ]
     
-    # Add known links to visit list
-    urls_to_visit.update(known_links)
-    
     # Scrape pages
-    page_count = 0
-    while urls_to_visit:
-        current_url = urls_to_visit.pop()
-        
-        if current_url in visited_urls:
-            continue
-        
-        print(f"\n[{page_count + 1}] Processing: {current_url}")
-        new_links = scrape_page(current_url, visited_urls)
-        
-        # Add new links to visit list (only if they're relevant documentation pages)
-        for link in new_links:
-            if link not in visited_urls and 'vertex-ai/generative-ai' in link:
-                # Limit to reasonable number of pages
-                if len(visited_urls) < 50:  # Safety limit
-                    urls_to_visit.add(link)
-        
-        page_count += 1
-        
-        # Safety limit
-        if page_count >= 50:
-            print("\nReached maximum page limit (50). Stopping.")
-            break
+    visited_urls = asyncio.run(crawl([MAIN_PAGE_URL, *known_links]))
     
     # Create summary file
     summary = {
@@ -290,8 +346,7 @@ def main():
         })
     
     summary_path = os.path.join(OUTPUT_DIR, "scraping_summary.json")
-    with open(summary_path, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    Path(summary_path).write_bytes(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
     
     print(f"\n{'='*80}")
     print(f"Scraping complete!")
@@ -1,5 +1,7 @@
 """Snapshot tool function for Live API function calling."""
-from typing import Dict, Any, Optional
+import asyncio
+from typing import Dict, Any, Optional, Callable, Awaitable
+from pybase64 import b64encode
 from video_capture import VideoCapture
 
 
@@ -25,12 +27,15 @@ def create_snapshot_tool(video_capture: VideoCapture) -> Dict[str, Any]:
     }
 
 
-async def handle_snapshot_tool_call(tool_call: Dict[str, Any], video_capture: VideoCapture) -> Dict[str, Any]:
+async def handle_snapshot_tool_call(tool_call: Dict[str, Any], video_capture: VideoCapture,
+                                    on_snapshot: Optional[Callable[[bytes], Awaitable[None]]] = None) -> Dict[str, Any]:
     """Handle a snapshot tool call from the Live API.
     
     Args:
         tool_call: Tool call message from Live API
         video_capture: VideoCapture instance to use for snapshots
+        on_snapshot: Optional coroutine function given the raw JPEG bytes,
+            so callers can store the image without decoding the response
         
     Returns:
         Tool response dictionary
@@ -42,17 +47,18 @@ async def handle_snapshot_tool_call(tool_call: Dict[str, Any], video_capture: Vi
         video_capture.pause()
         
         # Capture snapshot
-        snapshot_data = video_capture.capture_snapshot()
+        snapshot_data = await video_capture.capture_snapshot_async()
         
         if snapshot_data:
             # Resume video after a brief moment
-            import asyncio
             await asyncio.sleep(0.1)
             video_capture.resume()
             
-            # Return snapshot data as base64
-            import base64
-            snapshot_b64 = base64.b64encode(snapshot_data).decode('utf-8')
+            if on_snapshot:
+                await on_snapshot(snapshot_data)
+            
+            # Return snapshot data as base64 (function responses are JSON)
+            snapshot_b64 = b64encode(snapshot_data).decode('ascii')
             
             return {
                 "function_response": {
@@ -97,14 +97,14 @@ class LiveAPIApp {
     
     async captureSnapshot() {
         const canvas = document.getElementById('camera-canvas');
-        const imageData = canvas.toDataURL('image/jpeg');
+        const imageBlob = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg'));
         
-        // Send snapshot to backend
+        // Send snapshot to backend as raw JPEG bytes
         try {
             const response = await fetch('/api/snapshot', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ image: imageData })
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: imageBlob
             });
             
             const result = await response.json();
@@ -2,8 +2,18 @@
 import cv2
 import numpy as np
 from typing import Optional, Callable
+from turbojpeg import TurboJPEG, TJPF_BGR
 import config
 import asyncio
+import threading
+import time
+
+# Shared libjpeg-turbo encoder for snapshots and outgoing video frames
+turbo_jpeg = TurboJPEG()
+
+# Frame buffers rotated by the capture loop. Frames handed to on_frame may sit
+# in the sender's queue (2 deep) or be mid-send, so keep one more than that.
+FRAME_POOL_SIZE = 4
 
 
 class VideoCapture:
@@ -21,8 +31,14 @@ class VideoCapture:
         self.current_frame: Optional[np.ndarray] = None
         self.is_paused = False
         self.paused_frame: Optional[np.ndarray] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._frame_pool: list = []
+        self._pool_index = 0
+        self._resize_buf: Optional[np.ndarray] = None
+        self._encode_lock = threading.Lock()
         
-        # Callback for frame updates
+        # Callback for frame updates (receives BGR frames, called from the capture thread)
         self.on_frame: Optional[Callable] = None
         
     def start(self):
@@ -36,12 +52,26 @@ class VideoCapture:
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.VIDEO_HEIGHT)
         self.cap.set(cv2.CAP_PROP_FPS, config.VIDEO_FPS)
         
+        # Preallocate frame buffers at the size the camera actually delivers
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self._frame_pool = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(FRAME_POOL_SIZE)]
+        self._pool_index = 0
+        
         self.is_capturing = True
-        asyncio.create_task(self._capture_loop())
+        
+        # Camera reads block, so they run on a dedicated thread off the event loop
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._capture_thread, daemon=True)
+        self._thread.start()
     
     def stop(self):
         """Stop video capture."""
         self.is_capturing = False
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
         if self.cap:
             self.cap.release()
             self.cap = None
@@ -69,7 +99,7 @@ class VideoCapture:
         """Get the current frame (paused or live).
         
         Returns:
-            Current video frame as numpy array, or None if not available
+            Current video frame as a BGR numpy array, or None if not available
         """
         if self.is_paused and self.paused_frame is not None:
             return self.paused_frame
@@ -78,37 +108,68 @@ class VideoCapture:
     def capture_snapshot(self) -> Optional[bytes]:
         """Capture a snapshot of the current frame.
         
+        Returns:
+            JPEG-encoded image bytes, or None if no frame available
+        """
+        return self._encode_jpeg(self.get_current_frame())
+    
+    async def capture_snapshot_async(self) -> Optional[bytes]:
+        """Capture a snapshot without blocking the event loop.
+        
+        The JPEG encode runs on the loop's default executor.
+        
         Returns:
             JPEG-encoded image bytes, or None if no frame available
         """
         frame = self.get_current_frame()
+        return await asyncio.get_running_loop().run_in_executor(None, self._encode_jpeg, frame)
+    
+    def _encode_jpeg(self, frame: Optional[np.ndarray]) -> Optional[bytes]:
+        """Resize a frame to the snapshot resolution and encode it as JPEG."""
         if frame is None:
             return None
         
-        # Resize to required resolution if needed
-        if frame.shape[1] != config.VIDEO_WIDTH or frame.shape[0] != config.VIDEO_HEIGHT:
-            frame = cv2.resize(frame, (config.VIDEO_WIDTH, config.VIDEO_HEIGHT))
+        # Encode as JPEG straight from the camera's BGR layout
+        if frame.shape[1] == config.VIDEO_WIDTH and frame.shape[0] == config.VIDEO_HEIGHT:
+            return turbo_jpeg.encode(frame, quality=85, pixel_format=TJPF_BGR)
         
-        # Encode as JPEG
-        success, encoded_image = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        if success:
-            return encoded_image.tobytes()
-        return None
+        # Resize into a buffer allocated on first use (only needed if the camera
+        # ignored the requested size); the lock keeps concurrent snapshot
+        # encodes from sharing it
+        with self._encode_lock:
+            if self._resize_buf is None:
+                self._resize_buf = np.empty((config.VIDEO_HEIGHT, config.VIDEO_WIDTH, 3), dtype=np.uint8)
+            frame = cv2.resize(frame, (config.VIDEO_WIDTH, config.VIDEO_HEIGHT),
+                               dst=self._resize_buf, interpolation=cv2.INTER_AREA)
+            return turbo_jpeg.encode(frame, quality=85, pixel_format=TJPF_BGR)
     
-    async def _capture_loop(self):
-        """Internal loop for capturing frames."""
+    def _capture_thread(self):
+        """Internal loop for capturing frames on the capture thread."""
         frame_interval = 1.0 / config.VIDEO_FPS  # 1 second for 1 FPS
+        next_tick = time.monotonic()
         
         while self.is_capturing:
             if not self.is_paused:
-                ret, frame = self.cap.read()
+                # Read into the next pooled buffer instead of allocating a new frame
+                slot = self._pool_index
+                ret, frame = self.cap.read(self._frame_pool[slot])
                 if ret:
-                    # Convert BGR to RGB for web display
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    self.current_frame = frame_rgb
+                    # OpenCV reallocates if the frame size changed; adopt the new buffer
+                    self._frame_pool[slot] = frame
+                    self._pool_index = (slot + 1) % FRAME_POOL_SIZE
+                    
+                    # Frames stay in the camera's BGR layout end to end;
+                    # the JPEG encoders take BGR, so no conversion is needed
+                    self.current_frame = frame
                     
                     if self.on_frame:
-                        self.on_frame(frame_rgb)
+                        self.on_frame(frame)
             
-            await asyncio.sleep(frame_interval)
+            # Pace to the target frame rate; stop() wakes the wait early
+            next_tick += frame_interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                next_tick = time.monotonic()
 